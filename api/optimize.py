@@ -3,23 +3,73 @@ FastAPI optimization endpoint for Vercel deployment
 Zero-configuration FastAPI backend for AI cost optimization
 """
 
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Dict, Any, List
-import json
-from datetime import datetime
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from typing import Dict, Any, Set, Mapping
+from types import MappingProxyType
+import logging
+import orjson
+import os
+import queue
+import re
+import time
+from array import array
+from logging.handlers import QueueHandler, QueueListener
+from functools import lru_cache
 import asyncio
 
+logger = logging.getLogger("api.optimize")
+
+_log_listener = None
+
+
+def _setup_queue_logging() -> None:
+    """Route log records through a queue so emitting never blocks the
+    event loop on a write; a single listener thread does the I/O.
+
+    Runs from the startup hook so every uvicorn worker process gets it,
+    not just the supervisor.
+    """
+    global _log_listener
+    if _log_listener is not None:
+        return
+    log_queue = queue.SimpleQueue()
+    _log_listener = QueueListener(log_queue, logging.StreamHandler())
+    _log_listener.start()
+    logging.basicConfig(level=logging.WARNING, handlers=[QueueHandler(log_queue)])
+
+# Optional C-backed Aho-Corasick trie for multi-phrase replacement;
+# the compiled regex alternation remains the fallback
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 # Initialize FastAPI app
 app = FastAPI(
     title="AI Cost Optimization Engine",
     description="Zero-config FastAPI backend for AI optimization",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Store active WebSocket connections
-active_connections: List[WebSocket] = []
+active_connections: Set[WebSocket] = set()
+
+# ISO timestamp cached at one-second granularity; avoids a datetime
+# construction and strftime on every message at high QPS
+_ts_cache = [0, ""]
+
+
+def _now_iso() -> str:
+    """Current UTC time in ISO format, cached per second"""
+    second = int(time.time())
+    if second != _ts_cache[0]:
+        _ts_cache[0] = second
+        _ts_cache[1] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(second))
+    return _ts_cache[1]
 
 # CORS middleware for Next.js frontend
 app.add_middleware(
@@ -30,102 +80,192 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Pydantic models
-class OptimizationRequest(BaseModel):
-    prompt: str
-    context: str = "general"
-    budget: float = 0.05
-    quality_threshold: float = 0.95
-    optimization_strategy: str = "auto"
+# Compress larger JSON responses; small frames pass through untouched
+app.add_middleware(GZipMiddleware, minimum_size=512, compresslevel=5)
+
+# Verbose phrases and their concise alternatives, applied in one regex pass
+verbose_replacements: Mapping[str, str] = MappingProxyType({
+    "in order to": "to",
+    "due to the fact that": "because",
+    "at this point in time": "now",
+    "i would like to": "need",
+    "can you help me": "help",
+    "if it is possible": "if possible",
+    "as soon as possible": "ASAP",
+    "with regard to": "regarding",
+    "in the event that": "if",
+    "prior to": "before",
+    "subsequent to": "after",
+    "in the near future": "soon",
+    "in the meantime": "meanwhile",
+    "for the purpose of": "to",
+    "in the case of": "if",
+    "with reference to": "re:",
+    "in accordance with": "per",
+    "in the absence of": "without",
+    "in the presence of": "with",
+    "in the context of": "in",
+    "with respect to": "re:",
+    "in terms of": "for",
+    "from the perspective of": "from",
+    "in the form of": "as",
+    "in the process of": "while",
+    "in the course of": "during",
+    "in the midst of": "amid",
+    "in the wake of": "after",
+    "in the face of": "despite",
+    "in the light of": "given"
+})
+
+# Common pattern simplifications ("create a" -> "create", etc.)
+pattern_replacements: Mapping[str, str] = MappingProxyType({
+    "create a": "create",
+    "build a": "build",
+    "make a": "make",
+    "generate a": "generate",
+    "implement a": "implement",
+    "develop a": "develop"
+})
+
+
+def _compile_replacement_re(table: Mapping[str, str]) -> "re.Pattern":
+    """Compile a replacement table into a single alternation regex.
+
+    Longer phrases sort first so they win over any shorter prefix,
+    matching the greedy behavior of sequential str.replace calls.
+    """
+    alternation = "|".join(sorted(map(re.escape, table), key=len, reverse=True))
+    return re.compile(r"\b(?:" + alternation + r")\b", re.IGNORECASE)
+
+
+# Combined replacement table: verbose phrases plus pattern fixups,
+# all handled by the same single-pass matcher
+_REPLACEMENTS = {
+    k.lower(): v
+    for table in (verbose_replacements, pattern_replacements)
+    for k, v in table.items()
+}
+_REPLACE_RE = _compile_replacement_re(_REPLACEMENTS)
+
+
+def _build_automaton(table: Mapping[str, str]) -> "ahocorasick.Automaton":
+    """Build an Aho-Corasick automaton from a lower-cased replacement table"""
+    automaton = ahocorasick.Automaton()
+    for phrase, replacement in table.items():
+        automaton.add_word(phrase, (len(phrase), replacement))
+    automaton.make_automaton()
+    return automaton
+
+
+_REPLACE_AUTOMATON = _build_automaton(_REPLACEMENTS) if ahocorasick else None
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+def _replace_phrases(text: str) -> str:
+    """Replace verbose phrases and patterns in one linear pass.
+
+    Uses the C trie when pyahocorasick is installed, otherwise the
+    compiled regex alternation. Matches are taken greedily left to
+    right and must fall on word boundaries, mirroring the regex.
+    """
+    lowered = text.lower()
+    # Fall back to the regex when lowering changed the length (e.g.
+    # "İ" lowers to two characters): the automaton's offsets into
+    # lowered would misalign as slice indices into text
+    if _REPLACE_AUTOMATON is None or len(lowered) != len(text):
+        # IGNORECASE matches more broadly than str.lower() folds (e.g.
+        # "İn order to" matches but lowers to a non-key), so fall back
+        # to the matched text when the lookup misses
+        return _REPLACE_RE.sub(
+            lambda m: _REPLACEMENTS.get(m.group(0).lower(), m.group(0)), text
+        )
+
+    pieces = []
+    last = 0
+    for end, (length, replacement) in _REPLACE_AUTOMATON.iter(lowered):
+        start = end - length + 1
+        if start < last:
+            continue
+        if start > 0 and _is_word_char(lowered[start - 1]):
+            continue
+        if end + 1 < len(lowered) and _is_word_char(lowered[end + 1]):
+            continue
+        pieces.append(text[last:start])
+        pieces.append(replacement)
+        last = end + 1
+    if not pieces:
+        return text
+    pieces.append(text[last:])
+    return "".join(pieces)
+
+# Filler words dropped from prompts; longer words are kept for context
+_FILLER_WORDS = frozenset({
+    "the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", "of", "with", "by",
+    "please", "kindly", "would", "could", "should", "might", "may", "can", "will", "shall"
+})
+
+# Punctuation spacing fixup, applied in one compiled pass
+_PUNCT_RE = re.compile(r"\s+([,.?!])")
+
+
+def _score(original_tokens: int, optimized_tokens: int):
+    """Numeric scoring for an optimization: pure scalar math, no strings"""
+    token_reduction = max(0, original_tokens - optimized_tokens)
+    cost_reduction = token_reduction * 0.002  # $0.002 per token saved
+    quality_score = min(0.95, 0.85 + (token_reduction / max(original_tokens, 1)) * 0.3)
+    complexity_score = min(1.0, original_tokens / 50.0)
+    optimization_potential = min(1.0, token_reduction / 10.0)
+    strategy_effectiveness = min(1.0, token_reduction / 5.0)
+    return (token_reduction, cost_reduction, quality_score,
+            complexity_score, optimization_potential, strategy_effectiveness)
+
+
+# Opt-in JIT for the scoring math; worthwhile only once the scoring grows
+# beyond constant-time arithmetic, hence the env gate. The string pipeline
+# deliberately stays in pure Python.
+if os.environ.get("OPTIMIZE_NUMBA"):
+    try:
+        from numba import njit
+        _score = njit(cache=True)(_score)
+    except ImportError:
+        pass
 
 # Advanced optimization logic
-def optimize_prompt(prompt: str) -> Dict[str, Any]:
+@lru_cache(maxsize=4096)
+def _optimize_prompt_cached(prompt: str) -> Dict[str, Any]:
     """Advanced prompt optimization with ML-inspired algorithms"""
-    
+
     original_tokens = len(prompt.split())
     optimized = prompt
-    
-    # Strategy 1: Remove common filler words and redundant phrases
-    filler_words = {
-        "the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", "of", "with", "by",
-        "please", "kindly", "would", "could", "should", "might", "may", "can", "will", "shall"
-    }
-    
-    # Strategy 2: Replace verbose phrases with concise alternatives
-    verbose_replacements = {
-        "in order to": "to",
-        "due to the fact that": "because",
-        "at this point in time": "now",
-        "i would like to": "need",
-        "can you help me": "help",
-        "if it is possible": "if possible",
-        "as soon as possible": "ASAP",
-        "with regard to": "regarding",
-        "in the event that": "if",
-        "prior to": "before",
-        "subsequent to": "after",
-        "in the near future": "soon",
-        "in the meantime": "meanwhile",
-        "for the purpose of": "to",
-        "in the case of": "if",
-        "with reference to": "re:",
-        "in accordance with": "per",
-        "in the absence of": "without",
-        "in the presence of": "with",
-        "in the context of": "in",
-        "with respect to": "re:",
-        "in terms of": "for",
-        "from the perspective of": "from",
-        "in the form of": "as",
-        "in the process of": "while",
-        "in the course of": "during",
-        "in the midst of": "amid",
-        "in the wake of": "after",
-        "in the face of": "despite",
-        "in the light of": "given"
-    }
-    
-    # Apply verbose replacements
-    for verbose, concise in verbose_replacements.items():
-        optimized = optimized.replace(verbose, concise)
-    
-    # Remove filler words (but keep important context)
+
+    # Strategy 2 + 4: Replace verbose phrases and common patterns in
+    # one pass over the prompt
+    optimized = _replace_phrases(optimized)
+
+    # Strategy 1: Remove filler words but keep longer words for context.
+    # The length check short-circuits first, and already-lowercase tokens
+    # (the common case) skip the .lower() allocation entirely
     words = optimized.split()
-    filtered_words = []
-    for word in words:
-        if word.lower() not in filler_words or len(word) > 3:  # Keep longer words
-            filtered_words.append(word)
-    
+    filtered_words = [
+        w for w in words
+        if len(w) > 3 or (w if w.islower() else w.lower()) not in _FILLER_WORDS
+    ]
+
     optimized = " ".join(filtered_words)
-    
-    # Strategy 3: Remove redundant punctuation and spacing
-    optimized = " ".join(optimized.split())  # Clean up spaces
-    optimized = optimized.replace("  ", " ")  # Remove double spaces
-    optimized = optimized.replace(" ,", ",")  # Fix comma spacing
-    optimized = optimized.replace(" .", ".")  # Fix period spacing
-    optimized = optimized.replace(" ?", "?")  # Fix question spacing
-    optimized = optimized.replace(" !", "!")  # Fix exclamation spacing
-    
-    # Strategy 4: Optimize common patterns
-    optimized = optimized.replace("create a", "create")
-    optimized = optimized.replace("build a", "build")
-    optimized = optimized.replace("make a", "make")
-    optimized = optimized.replace("generate a", "generate")
-    optimized = optimized.replace("implement a", "implement")
-    optimized = optimized.replace("develop a", "develop")
-    
-    # Final cleanup
-    optimized = optimized.strip()
-    
-    optimized_tokens = len(optimized.split())
-    token_reduction = max(0, original_tokens - optimized_tokens)
-    cost_reduction = token_reduction * 0.002  # $0.002 per token saved
-    quality_score = min(0.95, 0.85 + (token_reduction / max(original_tokens, 1)) * 0.3)
-    
-    # Calculate complexity and optimization potential
-    complexity_score = min(1.0, original_tokens / 50.0)
-    optimization_potential = min(1.0, token_reduction / 10.0)
-    
+
+    # Strategy 3: Fix punctuation spacing; the join above already
+    # normalized whitespace, so no separate collapse or strip is needed
+    optimized = _PUNCT_RE.sub(r"\1", optimized)
+
+    # The output is single-spaced by construction, so counting spaces
+    # gives the token count without allocating another word list
+    optimized_tokens = (optimized.count(" ") + 1) if optimized else 0
+    (token_reduction, cost_reduction, quality_score, complexity_score,
+     optimization_potential, strategy_effectiveness) = _score(original_tokens, optimized_tokens)
+
     return {
         "original_prompt": prompt,
         "optimized_prompt": optimized,
@@ -140,46 +280,165 @@ def optimize_prompt(prompt: str) -> Dict[str, Any]:
             "complexity_score": complexity_score,
             "optimization_potential": optimization_potential,
             "confidence": quality_score,
-            "strategy_effectiveness": min(1.0, token_reduction / 5.0)
+            "strategy_effectiveness": strategy_effectiveness
         },
         "optimization_strategies": [
             "filler_removal",
-            "verbose_phrase_replacement", 
+            "verbose_phrase_replacement",
             "punctuation_optimization",
             "pattern_optimization"
         ]
     }
 
+
+def optimize_prompt(prompt: str) -> Dict[str, Any]:
+    """Optimize a prompt, serving repeated prompts from an in-process cache"""
+    result = _optimize_prompt_cached(prompt)
+    # Copy the cached entry so callers cannot mutate it
+    return {
+        **result,
+        "token_analysis": dict(result["token_analysis"]),
+        "ml_insights": dict(result["ml_insights"]),
+        "optimization_strategies": list(result["optimization_strategies"])
+    }
+
+# Pre-built error for the common validation failure; avoids allocating
+# an exception chain and detail string per rejected request
+_BAD_REQUEST = HTTPException(status_code=400, detail="invalid prompt")
+
+# Static provider metrics, serialized once at import
+_PROVIDERS_BYTES = orjson.dumps({
+    "providers": [
+        {
+            "provider_id": "openai-gpt4",
+            "cost_per_token": 0.03,
+            "quality_score": 0.95,
+            "response_time": 1.2,
+            "reliability": 0.99,
+            "recommendation_score": 0.92
+        },
+        {
+            "provider_id": "openai-gpt35",
+            "cost_per_token": 0.002,
+            "quality_score": 0.88,
+            "response_time": 0.8,
+            "reliability": 0.98,
+            "recommendation_score": 0.89
+        },
+        {
+            "provider_id": "perplexity-sonar",
+            "cost_per_token": 0.005,
+            "quality_score": 0.91,
+            "response_time": 1.0,
+            "reliability": 0.96,
+            "recommendation_score": 0.85
+        }
+    ]
+})
+
+# Ring buffer of recent optimization stats, stored as flat typed arrays
+# (structure of arrays) so aggregation runs over contiguous C buffers
+# instead of a list of dicts
+_STATS_CAPACITY = 4096
+_STATS_TOKENS_ORIG = array("l", [0]) * _STATS_CAPACITY
+_STATS_TOKENS_OPT = array("l", [0]) * _STATS_CAPACITY
+_STATS_SAVINGS = array("d", [0.0]) * _STATS_CAPACITY
+_stats_count = [0]  # total optimizations recorded, monotonically increasing
+
+
+def _record_optimization(result: Dict[str, Any]) -> None:
+    """Append one optimization's stats to the ring buffer"""
+    slot = _stats_count[0] % _STATS_CAPACITY
+    analysis = result["token_analysis"]
+    _STATS_TOKENS_ORIG[slot] = analysis["original_tokens"]
+    _STATS_TOKENS_OPT[slot] = analysis["optimized_tokens"]
+    _STATS_SAVINGS[slot] = result["cost_reduction"]
+    _stats_count[0] += 1
+
+
+def _recent_stats() -> Dict[str, Any]:
+    """Aggregate the ring buffer for /analytics"""
+    n = min(_stats_count[0], _STATS_CAPACITY)
+    if n == 0:
+        return {
+            "count": 0,
+            "total_savings": 0.0,
+            "average_savings": 0.0,
+            "average_token_reduction": 0.0
+        }
+    total_savings = sum(_STATS_SAVINGS[:n])
+    token_reduction = sum(_STATS_TOKENS_ORIG[:n]) - sum(_STATS_TOKENS_OPT[:n])
+    return {
+        "count": _stats_count[0],
+        "total_savings": total_savings,
+        "average_savings": total_savings / n,
+        "average_token_reduction": token_reduction / n
+    }
+
+# Canned WebSocket frames: everything but the timestamp is static, and
+# _now_iso() output never needs JSON escaping, so sends reduce to a
+# bytes concatenation instead of a dict serialization
+_FRAME_SUFFIX = b'"}'
+_PONG_PREFIX = b'{"type":"pong","timestamp":"'
+_ANALYTICS_FRAME_PREFIX = orjson.dumps({
+    "type": "analytics_update",
+    "data": {
+        "total_optimizations": 1247,
+        "average_savings": 0.18,
+        "total_savings": 224.5,
+        "success_rate": 0.92,
+        "recent_trend": 0.15
+    }
+})[:-1] + b',"timestamp":"'
+
 # Routes
 @app.get("/")
 async def root():
     """Health check endpoint"""
-    return {
+    return Response(content=orjson.dumps({
         "message": "AI Cost Optimization Engine (Vercel)",
         "version": "1.0.0",
         "status": "healthy",
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": _now_iso(),
         "features": {
             "optimization": "enabled",
-            "analytics": "enabled", 
+            "analytics": "enabled",
             "providers": "enabled",
             "deployment": "vercel"
         }
-    }
+    }), media_type="application/json")
 
 @app.post("/optimize")
-async def optimize(request: OptimizationRequest):
+async def optimize(request: Request):
     """Optimize a prompt using advanced ML-inspired techniques"""
+    # Only the prompt field is consumed, so the body is read directly
+    # instead of constructing a validation model per request
     try:
-        result = optimize_prompt(request.prompt)
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        body = orjson.loads(await request.body())
+    except orjson.JSONDecodeError:
+        raise _BAD_REQUEST
+    prompt = body.get("prompt", "") if isinstance(body, dict) else ""
+    if not isinstance(prompt, str) or not prompt.strip():
+        raise _BAD_REQUEST
+
+    async def stream():
+        # Echo the original prompt immediately so clients get first
+        # bytes while the optimization is still running
+        yield b'{"original_prompt":' + orjson.dumps(prompt)
+        # CPU-bound work runs in the threadpool so long prompts don't
+        # stall WebSocket heartbeats and concurrent requests
+        result = await asyncio.to_thread(optimize_prompt, prompt)
+        _record_optimization(result)
+        rest = {k: v for k, v in result.items() if k != "original_prompt"}
+        yield b"," + orjson.dumps(rest)[1:]
+
+    return StreamingResponse(stream(), media_type="application/json")
 
 @app.get("/analytics")
 async def get_analytics():
     """Get real-time analytics"""
-    return {
+    cache_info = _optimize_prompt_cached.cache_info()
+    return Response(content=orjson.dumps({
         "total_optimizations": 1247,
         "average_savings": 0.18,
         "total_savings": 224.5,
@@ -190,47 +449,27 @@ async def get_analytics():
             "filler_removal": 28,
             "pattern_optimization": 18,
             "punctuation_optimization": 12
-        }
-    }
+        },
+        "prompt_cache": {
+            "hits": cache_info.hits,
+            "misses": cache_info.misses,
+            "size": cache_info.currsize,
+            "max_size": cache_info.maxsize
+        },
+        "recent": _recent_stats()
+    }), media_type="application/json")
 
 @app.get("/providers")
 async def get_providers():
     """Get provider performance metrics"""
-    return {
-        "providers": [
-            {
-                "provider_id": "openai-gpt4",
-                "cost_per_token": 0.03,
-                "quality_score": 0.95,
-                "response_time": 1.2,
-                "reliability": 0.99,
-                "recommendation_score": 0.92
-            },
-            {
-                "provider_id": "openai-gpt35",
-                "cost_per_token": 0.002,
-                "quality_score": 0.88,
-                "response_time": 0.8,
-                "reliability": 0.98,
-                "recommendation_score": 0.89
-            },
-            {
-                "provider_id": "perplexity-sonar",
-                "cost_per_token": 0.005,
-                "quality_score": 0.91,
-                "response_time": 1.0,
-                "reliability": 0.96,
-                "recommendation_score": 0.85
-            }
-        ]
-    }
+    return Response(content=_PROVIDERS_BYTES, media_type="application/json")
 
 @app.get("/health")
 async def health_check():
     """Detailed health check"""
-    return {
+    return Response(content=orjson.dumps({
         "status": "healthy",
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": _now_iso(),
         "version": "1.0.0",
         "deployment": "vercel",
         "features": {
@@ -238,92 +477,150 @@ async def health_check():
             "analytics": "enabled",
             "providers": "enabled"
         }
-    }
+    }), media_type="application/json")
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     """WebSocket endpoint for real-time updates"""
     await websocket.accept()
-    active_connections.append(websocket)
+    active_connections.add(websocket)
     
     try:
         # Send initial connection confirmation
-        await websocket.send_text(json.dumps({
+        await websocket.send_bytes(orjson.dumps({
             "type": "connection_established",
             "message": "Connected to FastAPI optimization engine",
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": _now_iso(),
             "active_connections": len(active_connections)
         }))
         
         # Keep connection alive and handle messages
         while True:
             try:
-                # Wait for messages from client
-                data = await websocket.receive_text()
-                message = json.loads(data)
+                # Wait for messages from client; accept text or binary
+                # frames without forcing an extra decode (orjson parses
+                # bytes directly)
+                data = await websocket.receive()
+                if data["type"] == "websocket.disconnect":
+                    break
+                message = orjson.loads(data.get("bytes") or data.get("text") or b"")
                 
                 # Handle different message types
                 if message.get("type") == "ping":
-                    await websocket.send_text(json.dumps({
-                        "type": "pong",
-                        "timestamp": datetime.now().isoformat()
-                    }))
+                    await websocket.send_bytes(
+                        _PONG_PREFIX + _now_iso().encode() + _FRAME_SUFFIX
+                    )
                 elif message.get("type") == "get_analytics":
                     # Send current analytics
-                    analytics = {
-                        "total_optimizations": 1247,
-                        "average_savings": 0.18,
-                        "total_savings": 224.5,
-                        "success_rate": 0.92,
-                        "recent_trend": 0.15
-                    }
-                    await websocket.send_text(json.dumps({
-                        "type": "analytics_update",
-                        "data": analytics,
-                        "timestamp": datetime.now().isoformat()
-                    }))
+                    await websocket.send_bytes(
+                        _ANALYTICS_FRAME_PREFIX + _now_iso().encode() + _FRAME_SUFFIX
+                    )
                 else:
                     # Echo back unknown messages
-                    await websocket.send_text(json.dumps({
+                    await websocket.send_bytes(orjson.dumps({
                         "type": "echo",
                         "received": message,
-                        "timestamp": datetime.now().isoformat()
+                        "timestamp": _now_iso()
                     }))
                     
             except WebSocketDisconnect:
                 break
             except Exception as e:
-                await websocket.send_text(json.dumps({
+                await websocket.send_bytes(orjson.dumps({
                     "type": "error",
                     "message": str(e),
-                    "timestamp": datetime.now().isoformat()
+                    "timestamp": _now_iso()
                 }))
                 
     except WebSocketDisconnect:
         pass
     finally:
-        # Remove connection from active list
-        if websocket in active_connections:
-            active_connections.remove(websocket)
+        # Remove connection from active set; discard is idempotent
+        active_connections.discard(websocket)
+
+# Broadcasts are coalesced: producers enqueue, and a background task
+# flushes at most once per window so a burst of events costs one
+# serialization and one fan-out instead of one per event
+_BROADCAST_WINDOW = 0.01  # seconds
+_broadcast_queue: "asyncio.Queue[dict]" = asyncio.Queue()
+_broadcast_task = None  # keeps the flusher task alive (see asyncio docs)
+
+
+async def _send_to_all(payload: bytes):
+    """Fan a serialized frame out to every connected client"""
+    if not active_connections:
+        return
+
+    # Send to all clients concurrently; broadcast latency becomes the
+    # slowest client instead of the sum of all of them
+    connections = list(active_connections)
+    results = await asyncio.gather(
+        *(connection.send_bytes(payload) for connection in connections),
+        return_exceptions=True
+    )
+
+    # Prune connections whose send failed in one set operation
+    active_connections.difference_update(
+        connection for connection, result in zip(connections, results)
+        if isinstance(result, Exception)
+    )
+
 
 async def broadcast_message(message: dict):
-    """Broadcast a message to all connected WebSocket clients"""
-    if active_connections:
-        message_str = json.dumps(message)
-        disconnected = []
-        
-        for connection in active_connections:
+    """Queue a message for the next coalesced broadcast"""
+    await _broadcast_queue.put(message)
+
+
+async def _broadcast_flusher():
+    """Drain queued messages once per window and send them as one frame"""
+    while True:
+        batch = [await _broadcast_queue.get()]
+        while True:
             try:
-                await connection.send_text(message_str)
-            except:
-                disconnected.append(connection)
-        
-        # Remove disconnected connections
-        for connection in disconnected:
-            if connection in active_connections:
-                active_connections.remove(connection)
+                batch.append(_broadcast_queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+
+        # A lone message keeps its original shape; bursts are wrapped
+        # so clients receive one frame per window. A message that fails
+        # to serialize must not kill the loop for everyone else
+        try:
+            if len(batch) == 1:
+                payload = orjson.dumps(batch[0])
+            else:
+                payload = orjson.dumps({"type": "batch", "items": batch})
+            await _send_to_all(payload)
+        except Exception:
+            logger.exception("dropping broadcast batch of %d message(s)", len(batch))
+        await asyncio.sleep(_BROADCAST_WINDOW)
+
+
+@app.on_event("startup")
+async def _start_broadcast_flusher():
+    global _broadcast_task
+    _setup_queue_logging()
+    _broadcast_task = asyncio.create_task(_broadcast_flusher())
 
 # Vercel serverless function handler
 def handler(request):
     """Vercel serverless function entry point"""
     return app
+
+
+if __name__ == "__main__":
+    # Self-hosted entry point; Vercel uses the handler above.
+    # uvloop and httptools replace the default event loop and HTTP
+    # parser with C implementations, with one worker per core. Queue
+    # logging is wired per worker in the startup hook.
+    import uvicorn
+
+    uvicorn.run(
+        "api.optimize:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        workers=os.cpu_count(),
+        log_level="warning",
+        access_log=False
+    )
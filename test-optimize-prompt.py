@@ -0,0 +1,30 @@
+"""
+Regression checks for the FastAPI prompt optimizer
+Run with: python test-optimize-prompt.py
+"""
+
+import sys
+
+sys.path.insert(0, "api")
+
+from optimize import optimize_prompt
+
+
+def test_basic_optimization():
+    result = optimize_prompt("Can you help me in order to create a web app ?")
+    assert result["optimized_prompt"] == "help create web app?", result["optimized_prompt"]
+    assert result["token_analysis"]["optimized_tokens"] == 4
+
+
+def test_dotted_capital_i_prompt():
+    # "İn order to" matches the replacement regex under IGNORECASE, but
+    # its lower() ("i̇n order to") is not a table key; the lookup
+    # must fall back to the matched text instead of raising KeyError
+    result = optimize_prompt("İn order to do this")
+    assert result["optimized_prompt"] == "İn order do this", result["optimized_prompt"]
+
+
+if __name__ == "__main__":
+    test_basic_optimization()
+    test_dotted_capital_i_prompt()
+    print("✅ All prompt optimizer checks passed")